@@ -1,18 +1,55 @@
 import socket
 import struct
+import ctypes
+import errno
+import math
 import numpy as np
-import matplotlib.pyplot as plt
-from matplotlib.animation import FuncAnimation
 import threading
-from collections import deque
 import os
+import sys
 import time
+import matplotlib
+# TkAgg's blit releases the GIL (Matplotlib >= 3.5), so repaints don't starve the data thread
+matplotlib.use(os.environ.get("MPLBACKEND", "TkAgg"))
+if tuple(int(v) for v in matplotlib.__version__.split('.')[:2]) < (3, 5):
+    raise RuntimeError(f"Matplotlib >= 3.5 required, found {matplotlib.__version__}")
+import matplotlib.pyplot as plt
+from matplotlib.transforms import Bbox
+
+try:
+    from numba import njit
+except ImportError:
+    njit = None  # fall back to the NumPy implementation below
 
 # --- Global Data Structures ---
-data_lock = threading.Lock()
+# Single producer (receiver thread) / single consumer (animation callback), no lock:
+# - latest_csi_data[rx] is only ever rebound to new (re, im) arrays, never mutated in place;
+#   dict item assignment is atomic under the GIL.
+# - the TA ring slots are written before ta_head/ta_count are published, and the
+#   consumer reads ta_count/ta_head once before taking its snapshot.
+# - the receiver publishes once per received batch, not once per packet.
 latest_csi_data = {}
-ta_history = deque()
+# Time alignment history: fixed-capacity ring buffer (oldest samples overwritten)
+TA_CAP = 1 << 16
+ta_buf = np.empty(TA_CAP, np.float64)
+ta_head = 0
+ta_count = 0
+# Running extremes, maintained by the producer so the TA y-limits only change when exceeded
+ta_min = np.inf
+ta_max = -np.inf
+# Only the most recent TA_WINDOW samples are plotted, decimated to about TA_PLOT_POINTS
+TA_WINDOW = 4096
+TA_PLOT_POINTS = 2000
+# Constant x-axis vectors, shared across frames (read-only so nothing mutates them in place)
+X_TA = np.arange(TA_WINDOW, dtype=np.float32)
+X_TA.setflags(write=False)
+X_SUB = None  # set in setup_plots once the subcarrier count is known
 rx_ports = set()
+# Bumped by the receiver once per published batch; update_plots skips frames with no new data
+rev = 0
+csi_rev = {}
+last_rev = 0
+last_csi_rev = {}
 
 # Data saving setup
 output_dir = "csi_data_logs"
@@ -24,80 +61,391 @@ SAVE_EVERY_N = 1000
 fig = None
 axs = {}
 lines = {}
+blit_mgr = None
+# Per-RX line data reused every frame: {'x', 'mag', 'phase'}
+plot_bufs = {}
+# Magnitude/phase are display-only, so half precision is plenty (~3 significant digits)
+# for the NumPy path. numba's CPU target has no float16 arrays, so the JIT kernel
+# writes float32.
+PLOT_DTYPE = np.float32 if njit is not None else np.float16
+
+# --- recvmmsg(2) batching ---
+RECV_BATCH = 64
+RECV_BUF_SIZE = 8192
+MSG_WAITFORONE = 0x10000
+
+# Kernel receive buffer; needs net.core.rmem_max >= this (see 99-csiplot-udp.conf)
+RECV_SOCK_BUF = 12 * 1024 * 1024
+# NAPI busy-poll budget in microseconds for blocking receives (burns CPU for lower latency); None = off
+RECV_BUSY_POLL_US = None
+SO_BUSY_POLL = getattr(socket, "SO_BUSY_POLL", 46)  # Linux value; not exported by every Python build
+# Pin the receiver thread to this CPU (ideally the one serving the NIC RX IRQ); None = no pinning
+RECV_CPU = None
+
+
+class _IoVec(ctypes.Structure):
+    _fields_ = [("iov_base", ctypes.c_void_p),
+                ("iov_len", ctypes.c_size_t)]
+
+
+class _MsgHdr(ctypes.Structure):
+    _fields_ = [("msg_name", ctypes.c_void_p),
+                ("msg_namelen", ctypes.c_uint32),
+                ("msg_iov", ctypes.POINTER(_IoVec)),
+                ("msg_iovlen", ctypes.c_size_t),
+                ("msg_control", ctypes.c_void_p),
+                ("msg_controllen", ctypes.c_size_t),
+                ("msg_flags", ctypes.c_int)]
+
+
+class _MMsgHdr(ctypes.Structure):
+    _fields_ = [("msg_hdr", _MsgHdr),
+                ("msg_len", ctypes.c_uint)]
+
+
+_recvmmsg = None
+# CDLL(None) is a TypeError on Windows, and other platforms lack recvmmsg anyway
+if sys.platform.startswith("linux"):
+    try:
+        _recvmmsg = ctypes.CDLL(None, use_errno=True).recvmmsg
+        _recvmmsg.argtypes = [ctypes.c_int, ctypes.POINTER(_MMsgHdr), ctypes.c_uint,
+                              ctypes.c_int, ctypes.c_void_p]
+        _recvmmsg.restype = ctypes.c_int
+    except (OSError, AttributeError):
+        _recvmmsg = None  # no recvmmsg in this libc
+
+
+class MmsgReceiver:
+    """
+    Pull up to RECV_BATCH datagrams per syscall with recvmmsg(2).
+    The buffers are allocated once and reused, so returned views are only
+    valid until the next recv() call.
+    """
+
+    def __init__(self, sock, batch=RECV_BATCH, buf_size=RECV_BUF_SIZE):
+        self.fd = sock.fileno()
+        self.batch = batch
+        self.bufs = [bytearray(buf_size) for _ in range(batch)]
+        self.views = [memoryview(b) for b in self.bufs]
+        self._c_bufs = [(ctypes.c_char * buf_size).from_buffer(b) for b in self.bufs]
+        self.iovecs = (_IoVec * batch)()
+        self.msgs = (_MMsgHdr * batch)()
+        for i in range(batch):
+            self.iovecs[i].iov_base = ctypes.addressof(self._c_bufs[i])
+            self.iovecs[i].iov_len = buf_size
+            self.msgs[i].msg_hdr.msg_iov = ctypes.pointer(self.iovecs[i])
+            self.msgs[i].msg_hdr.msg_iovlen = 1
+
+    def recv(self):
+        n = _recvmmsg(self.fd, self.msgs, self.batch, MSG_WAITFORONE, None)
+        if n < 0:
+            err = ctypes.get_errno()
+            if err == errno.EINTR:
+                return []
+            raise OSError(err, os.strerror(err))
+        return [self.views[i][:self.msgs[i].msg_len] for i in range(n)]
+
+
+class RecvfromReceiver:
+    """
+    Fallback for platforms without recvmmsg(2): block for one datagram, then
+    drain whatever else is already queued (up to batch) without blocking.
+    Buffers are reused, like MmsgReceiver.
+    """
+
+    def __init__(self, sock, batch=RECV_BATCH, buf_size=RECV_BUF_SIZE):
+        self.sock = sock
+        # Without MSG_DONTWAIT (e.g. Windows) there is no non-blocking drain
+        self.flags = getattr(socket, "MSG_DONTWAIT", 0)
+        self.bufs = [bytearray(buf_size) for _ in range(batch if self.flags else 1)]
+        self.views = [memoryview(b) for b in self.bufs]
+
+    def recv(self):
+        out = [self.views[0][:self.sock.recv_into(self.bufs[0])]]
+        for i in range(1, len(self.bufs)):
+            try:
+                n = self.sock.recv_into(self.bufs[i], 0, self.flags)
+            except BlockingIOError:
+                break
+            out.append(self.views[i][:n])
+        return out
+
+
+def parse_csi_packet(data):
+    """
+    Generic parser for [rx, tx, ta, re0, im0, re1, im1, ...] float32 payloads.
+    Returns (rx_port, tx_port, ta_s, re, im), or None if malformed.
+    """
+    # Zero-copy view of the receive buffer
+    floats = np.frombuffer(data, dtype=np.float32, count=len(data) // 4)
+    if len(floats) < 3 or len(floats) % 2 == 0:
+        return None
+    # AoS -> SoA once on receipt: contiguous re/im vectors for the plot kernels.
+    # These are copies, so they outlive the receive buffer reused by the next recv()
+    return int(floats[0]), int(floats[1]), float(floats[2]), floats[3::2].copy(), floats[4::2].copy()
+
+
+def make_fixed_parser(n_sub):
+    """
+    Build a parser specialized for packets with exactly n_sub subcarriers:
+    fixed offsets, no shape checks. It returns None for any other length,
+    so the caller falls back to parse_csi_packet.
+    """
+    size = 4 * (3 + 2 * n_sub)
+    unpack_header = struct.Struct("=3f").unpack_from
+
+    def parse(data):
+        if len(data) != size:
+            return None
+        rx, tx, ta = unpack_header(data)
+        iq = np.frombuffer(data, np.float32, 2 * n_sub, 12)
+        return int(rx), int(tx), ta, iq[0::2].copy(), iq[1::2].copy()
+
+    return parse
 
 
 def recv_csi_udp(listen_ip="0.0.0.0", listen_port=5000):
-    global latest_csi_data, rx_ports, ta_history, save_buffer
+    global latest_csi_data, rx_ports, ta_head, ta_count, ta_min, ta_max, rev, save_buffer
 
     sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
     sock.bind((listen_ip, listen_port))
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, RECV_SOCK_BUF)
+    rcvbuf = sock.getsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF)
+    # Linux reports twice the usable size and silently caps at net.core.rmem_max
+    print(f"SO_RCVBUF requested {RECV_SOCK_BUF} bytes, got {rcvbuf} bytes")
+
+    if RECV_BUSY_POLL_US is not None:
+        try:
+            sock.setsockopt(socket.SOL_SOCKET, SO_BUSY_POLL, RECV_BUSY_POLL_US)
+            print(f"SO_BUSY_POLL set to {RECV_BUSY_POLL_US} µs")
+        except OSError as e:
+            # Values above net.core.busy_read need CAP_NET_ADMIN
+            print(f"SO_BUSY_POLL not enabled: {e}")
+
+    if RECV_CPU is not None:
+        os.sched_setaffinity(0, {RECV_CPU})
+        print(f"Receiver pinned to CPU {RECV_CPU}")
 
     print(f"Listening(UDP) on {listen_ip}:{listen_port} ...")
 
-    while True:
-        data, addr = sock.recvfrom(8192)
-        if not data:
-            break
+    if _recvmmsg is not None:
+        receiver = MmsgReceiver(sock)
+        print(f"Using recvmmsg, batch={RECV_BATCH}")
+    else:
+        receiver = RecvfromReceiver(sock)
+
+    fixed_parser = None
+    running = True
+    while running:
+        # Stage the whole batch locally and publish it once below
+        batch_csi = {}
+        batch_ta = []
+        for data in receiver.recv():
+            if not data:
+                running = False
+                break
+
+            parsed = fixed_parser(data) if fixed_parser is not None else None
+            if parsed is None:
+                parsed = parse_csi_packet(data)
+                if parsed is None:
+                    continue
+                if fixed_parser is None:
+                    fixed_parser = make_fixed_parser(len(parsed[3]))
+                    print(f"CSI length {len(parsed[3])}, using fixed-offset parser")
+
+            rx_port, tx_port, time_alignment_s, re, im = parsed
+
+            batch_csi[rx_port] = (re, im)  # only the newest per port is plotted
+            batch_ta.append(time_alignment_s * 1e6)  # microseconds
+
+            print(f"RX={rx_port}, TX={tx_port}, TA={time_alignment_s * 1e6:.3f} µs, CSI_len={len(re)}")
+
+            # --- Save to buffer ---
+            save_buffer.append({
+                "rx_port": rx_port,
+                "tx_port": tx_port,
+                "ta_us": time_alignment_s * 1e6,
+                "re": re,
+                "im": im
+            })
+
+            # --- Periodically save to file ---
+            if len(save_buffer) >= SAVE_EVERY_N:
+                timestamp = int(time.time())
+                filename = os.path.join(output_dir, f"csi_snapshot_{timestamp}.npz")
+
+                # Convert to arrays
+                rx_ports_arr = np.array([d['rx_port'] for d in save_buffer])
+                tx_ports_arr = np.array([d['tx_port'] for d in save_buffer])
+                ta_arr = np.array([d['ta_us'] for d in save_buffer])
+                csi_arr = np.empty((len(save_buffer), len(save_buffer[0]['re'])), np.complex64)
+                csi_arr.real = [d['re'] for d in save_buffer]
+                csi_arr.imag = [d['im'] for d in save_buffer]
+
+                np.savez_compressed(filename,
+                                    rx_port=rx_ports_arr,
+                                    tx_port=tx_ports_arr,
+                                    ta_us=ta_arr,
+                                    csi=csi_arr)
+                print(f"[Saved] {filename}, {len(save_buffer)} entries")
+                save_buffer.clear()
+
+        if batch_ta:
+            # TA ring: one slice write (split at the wrap point), then publish head/count
+            ta_new = np.asarray(batch_ta)
+            k = len(ta_new)
+            end = ta_head + k
+            if end <= TA_CAP:
+                ta_buf[ta_head:end] = ta_new
+            else:
+                ta_buf[ta_head:] = ta_new[:TA_CAP - ta_head]
+                ta_buf[:end - TA_CAP] = ta_new[TA_CAP - ta_head:]
+            ta_min = min(ta_min, ta_new.min())
+            ta_max = max(ta_max, ta_new.max())
+            latest_csi_data.update(batch_csi)
+            rx_ports.update(batch_csi)
+            ta_head = end % TA_CAP
+            ta_count = min(ta_count + k, TA_CAP)
+            # Per-port revisions before the global one: a consumer that sees the new
+            # rev must also see which ports it covers
+            new_rev = rev + 1
+            for rx in batch_csi:
+                csi_rev[rx] = new_rev
+            rev = new_rev
 
-        floats = np.frombuffer(data, dtype=np.float32)
-        if len(floats) < 3:
-            continue
+    sock.close()
 
-        rx_port = int(floats[0])
-        tx_port = int(floats[1])
-        time_alignment_s = floats[2]
-
-        csi_complex = floats[3:].reshape(-1, 2)
-        csi = csi_complex[:, 0] + 1j * csi_complex[:, 1]
-
-        with data_lock:
-            latest_csi_data[rx_port] = csi
-            ta_history.append(time_alignment_s * 1e6)  # microseconds
-            rx_ports.add(rx_port)
-
-        print(f"RX={rx_port}, TX={tx_port}, TA={time_alignment_s * 1e6:.3f} µs, CSI_len={len(csi)}")
-
-        # --- Save to buffer ---
-        save_buffer.append({
-            "rx_port": rx_port,
-            "tx_port": tx_port,
-            "ta_us": time_alignment_s * 1e6,
-            "csi": csi
-        })
-
-        # --- Periodically save to file ---
-        if len(save_buffer) >= SAVE_EVERY_N:
-            timestamp = int(time.time())
-            filename = os.path.join(output_dir, f"csi_snapshot_{timestamp}.npz")
-
-            # Convert to arrays
-            rx_ports_arr = np.array([d['rx_port'] for d in save_buffer])
-            tx_ports_arr = np.array([d['tx_port'] for d in save_buffer])
-            ta_arr = np.array([d['ta_us'] for d in save_buffer])
-            csi_arr = np.array([d['csi'] for d in save_buffer])
-
-            np.savez_compressed(filename,
-                                rx_port=rx_ports_arr,
-                                tx_port=tx_ports_arr,
-                                ta_us=ta_arr,
-                                csi=csi_arr)
-            print(f"[Saved] {filename}, {len(save_buffer)} entries")
-            save_buffer.clear()
 
-    sock.close()
+def _mag_phase_unwrap(re, im, out_mag, out_phase):
+    """
+    Fused magnitude, angle and unwrap in one pass over the CSI vector.
+    The unwrap correction is kept as an integer number of 2*pi periods
+    rather than a running float sum, so it does not drift on long vectors.
+    """
+    k = 0
+    prev = 0.0
+    for i in range(re.shape[0]):
+        out_mag[i] = math.hypot(re[i], im[i])
+        a = math.atan2(im[i], re[i])
+        d = a - prev
+        k += int(d < -math.pi) - int(d > math.pi)
+        out_phase[i] = a + 2.0 * math.pi * k
+        prev = a
+
+
+def _mag_phase_unwrap_np(re, im, out_mag, out_phase):
+    np.hypot(re, im, out=out_mag)
+    out_phase[:] = np.unwrap(np.arctan2(im, re))
+
+
+if njit is not None:
+    mag_phase_unwrap = njit(cache=True, fastmath=True)(_mag_phase_unwrap)
+else:
+    mag_phase_unwrap = _mag_phase_unwrap_np
+
+
+def alloc_plot_bufs(n_sub):
+    # x stays float32: float16 can't represent every index above 2048
+    x = X_SUB if len(X_SUB) == n_sub else np.arange(n_sub, dtype=np.float32)
+    return {'x': x,
+            'mag': np.empty(n_sub, PLOT_DTYPE),
+            'phase': np.empty(n_sub, PLOT_DTYPE)}
+
+
+def decimate_minmax(y, n_out):
+    """
+    Reduce y to about n_out points by keeping the min and max of each bucket
+    (in time order), which looks identical to the full line at screen resolution.
+    Returns the indices to keep, or None if y is already short enough.
+    """
+    n = len(y)
+    if n <= n_out:
+        return None
+    n_buckets = n_out // 2
+    size = n // n_buckets
+    buckets = y[:n_buckets * size].reshape(n_buckets, size)
+    base = np.arange(n_buckets)[:, None] * size
+    idx = np.sort(np.stack((buckets.argmin(axis=1), buckets.argmax(axis=1)), axis=1), axis=1) + base
+    return np.concatenate((idx.ravel(), np.arange(n_buckets * size, n)))
+
+
+class BlitManager:
+    """
+    Redraw only the line artists that changed on top of per-axes backgrounds
+    cached at the last full draw (after Matplotlib's blitting tutorial).
+    Any full redraw (resize, expose, limit change) refreshes the cache.
+    Changed axes are blitted as a few union boxes rather than one blit each.
+    """
+
+    # Merge a box into a group only if the union's area stays within this factor
+    # of the area actually being updated
+    MAX_UNION_WASTE = 1.5
+
+    def __init__(self, canvas, artists):
+        self.canvas = canvas
+        self.artists = list(artists)
+        self.backgrounds = {}
+        for a in self.artists:
+            a.set_animated(True)
+        canvas.mpl_connect("draw_event", self.on_draw)
+
+    def on_draw(self, event):
+        self.backgrounds = {a.axes: self.canvas.copy_from_bbox(a.axes.bbox) for a in self.artists}
+        for a in self.artists:
+            a.axes.draw_artist(a)
+
+    def update(self, artists):
+        if not self.backgrounds or not artists:
+            return
+        changed_axes = {a.axes for a in artists}
+        for ax in changed_axes:
+            self.canvas.restore_region(self.backgrounds[ax])
+        for a in artists:
+            a.axes.draw_artist(a)
+        for bbox in self.coalesce([ax.bbox for ax in changed_axes]):
+            self.canvas.blit(bbox)
+
+    def coalesce(self, boxes):
+        """Merge boxes while a union doesn't repaint too much unchanged area."""
+        groups = [(box, box.width * box.height) for box in boxes]  # (union, summed area)
+        if len(groups) > 1:
+            union = Bbox.union([g[0] for g in groups])
+            if union.width * union.height <= self.MAX_UNION_WASTE * sum(g[1] for g in groups):
+                return [union]
+        merged = True
+        while merged:
+            merged = False
+            for i in range(len(groups)):
+                for j in range(i + 1, len(groups)):
+                    union = Bbox.union([groups[i][0], groups[j][0]])
+                    area = groups[i][1] + groups[j][1]
+                    if union.width * union.height <= self.MAX_UNION_WASTE * area:
+                        groups[i] = (union, area)
+                        del groups[j]
+                        merged = True
+                        break
+                if merged:
+                    break
+        return [g[0] for g in groups]
 
 
 def setup_plots():
-    global fig, axs, lines
+    global fig, axs, lines, blit_mgr, X_SUB, plot_bufs
 
     while not rx_ports:
         threading.Event().wait(0.5)
 
     n_rx = len(rx_ports)
     rx_port_list = sorted(list(rx_ports))
+    # Subcarrier count is fixed per session; pin the x-limits so blitted axes stay static
+    n_sub = len(latest_csi_data[rx_port_list[0]][0])
 
     print(f"Setting up plots for RX ports: {rx_port_list}")
 
+    X_SUB = np.arange(n_sub, dtype=np.float32)
+    X_SUB.setflags(write=False)
+
     fig = plt.figure(figsize=(4 * (n_rx + 1), 8))
     gs = fig.add_gridspec(2, n_rx + 1)
 
@@ -109,6 +457,7 @@ def setup_plots():
         ax_mag.set_xlabel('Subcarrier Index', fontsize=12)
         ax_mag.grid(True)
         ax_mag.set_ylim(0, 1)
+        ax_mag.set_xlim(0, n_sub - 1 if n_sub > 1 else 1)
 
         ax_phase = fig.add_subplot(gs[1, i])
         l2, = ax_phase.plot([], [], label=f'RX {rx_port}')
@@ -117,15 +466,18 @@ def setup_plots():
         ax_phase.set_xlabel('Subcarrier Index', fontsize=12)
         ax_phase.grid(True)
         ax_phase.set_ylim(-10, 10)
+        ax_phase.set_xlim(0, n_sub - 1 if n_sub > 1 else 1)
 
         axs[rx_port] = {'mag': ax_mag, 'phase': ax_phase}
         lines[rx_port] = {'mag': l1, 'phase': l2}
+        plot_bufs[rx_port] = alloc_plot_bufs(n_sub)
 
     ax_ta = fig.add_subplot(gs[:, n_rx])
     l_ta, = ax_ta.plot([], [], 'r.-', label='Time Alignment')
     ax_ta.set_title("Time Alignment History", fontsize=14)
     ax_ta.set_ylabel("Time Alignment (µs)", fontsize=12)
     ax_ta.set_xlabel("Sample Index", fontsize=12)
+    ax_ta.set_xlim(0, TA_WINDOW)
     ax_ta.grid(True)
     ax_ta.legend()
 
@@ -134,55 +486,84 @@ def setup_plots():
 
     plt.tight_layout(pad=2.0)
 
+    blit_mgr = BlitManager(fig.canvas, [l for rx in rx_port_list for l in lines[rx].values()] + [l_ta])
 
-def update_plots(frame):
-    global latest_csi_data, ta_history, lines, axs
+
+def update_plots():
+    global latest_csi_data, lines, axs, last_rev
 
     updated_lines = []
 
-    with data_lock:
-        local_csi_data = latest_csi_data.copy()
-        local_ta_history = list(ta_history)
+    r = rev
+    if r == last_rev:
+        return []
+    last_rev = r
+
+    # Revisions first: the data copied after them is at least this new
+    local_csi_rev = csi_rev.copy()
+    local_csi_data = latest_csi_data.copy()
+    n, head = min(ta_count, TA_WINDOW), ta_head
+    if head >= n:
+        local_ta = ta_buf[head - n:head]
+    else:
+        local_ta = np.concatenate((ta_buf[head - n:], ta_buf[:head]))
 
     if not local_csi_data or not lines:
         return []
 
-    for rx_port, csi_data in local_csi_data.items():
+    for rx_port, (re, im) in local_csi_data.items():
         if rx_port not in lines:
             continue
+        if local_csi_rev.get(rx_port) == last_csi_rev.get(rx_port):
+            continue
+        last_csi_rev[rx_port] = local_csi_rev.get(rx_port)
 
-        mag = np.abs(csi_data)
-        phase_unwrapped = np.unwrap(np.angle(csi_data))
-        x_data = np.arange(len(mag))
-
-        lines[rx_port]['mag'].set_data(x_data, mag)
-        axs[rx_port]['mag'].set_xlim(0, len(mag) - 1 if len(mag) > 1 else 1)
+        bufs = plot_bufs[rx_port]
+        if len(bufs['x']) != len(re):
+            # Subcarrier count changed mid-session; the kernel must not write past the buffers
+            bufs = plot_bufs[rx_port] = alloc_plot_bufs(len(re))
+        mag_phase_unwrap(re, im, bufs['mag'], bufs['phase'])
 
-        lines[rx_port]['phase'].set_data(x_data, phase_unwrapped)
-        axs[rx_port]['phase'].set_xlim(0, len(phase_unwrapped) - 1 if len(phase_unwrapped) > 1 else 1)
+        lines[rx_port]['mag'].set_data(bufs['x'], bufs['mag'])
+        lines[rx_port]['phase'].set_data(bufs['x'], bufs['phase'])
 
         updated_lines.extend([lines[rx_port]['mag'], lines[rx_port]['phase']])
 
-    if 'ta' in lines and local_ta_history:
+    if 'ta' in lines and len(local_ta):
         ta_line = lines['ta']
         ta_ax = axs['ta']
 
-        x_ta_data = np.arange(len(local_ta_history))
-        ta_line.set_data(x_ta_data, local_ta_history)
+        idx = decimate_minmax(local_ta, TA_PLOT_POINTS)
+        if idx is None:
+            ta_line.set_data(X_TA[:len(local_ta)], local_ta)
+        else:
+            ta_line.set_data(idx, local_ta[idx])
 
-        ta_ax.relim()
-        ta_ax.autoscale_view(True, True, True)
+        # The running extremes only ever widen, so the full redraw a limit change needs is rare
+        lo, hi = ta_ax.get_ylim()
+        if ta_min < lo or ta_max > hi:
+            pad = max(0.1 * (ta_max - ta_min), 1e-3)
+            ta_ax.set_ylim(ta_min - pad, ta_max + pad)
+            fig.canvas.draw_idle()
 
         updated_lines.append(ta_line)
 
+    blit_mgr.update(updated_lines)
     return updated_lines
 
 
 if __name__ == "__main__":
+    # Compile the kernel now (same argument layout as update_plots) so the first frame doesn't stall
+    if njit is not None:
+        warm = np.zeros(2, np.float32)
+        mag_phase_unwrap(warm, warm, np.empty(2, PLOT_DTYPE), np.empty(2, PLOT_DTYPE))
+
     t = threading.Thread(target=recv_csi_udp, args=("0.0.0.0", 5000), daemon=True)
     t.start()
 
     setup_plots()
-    ani = FuncAnimation(fig, update_plots, interval=50, blit=False)
+    timer = fig.canvas.new_timer(interval=50)
+    timer.add_callback(update_plots)
+    timer.start()
     plt.show()
 
@@ -1,48 +1,119 @@
 import numpy as np
-import matplotlib.pyplot as plt
-from matplotlib.animation import FuncAnimation
 import threading
-from collections import deque
 import time
 import os
+import matplotlib
+# TkAgg's blit releases the GIL (Matplotlib >= 3.5), so repaints don't starve the data thread
+matplotlib.use(os.environ.get("MPLBACKEND", "TkAgg"))
+if tuple(int(v) for v in matplotlib.__version__.split('.')[:2]) < (3, 5):
+    raise RuntimeError(f"Matplotlib >= 3.5 required, found {matplotlib.__version__}")
+import matplotlib.pyplot as plt
+from matplotlib.transforms import Bbox
 
 # --- Global Data Structures ---
 data_lock = threading.Lock()
 latest_csi_data = {}
-ta_history = deque()
+# Time alignment history: fixed-capacity ring buffer (oldest samples overwritten)
+TA_CAP = 1 << 16
+ta_buf = np.empty(TA_CAP, np.float64)
+ta_head = 0
+ta_count = 0
+# Running extremes, maintained by the producer so the TA y-limits only change when exceeded
+ta_min = np.inf
+ta_max = -np.inf
+# Only the most recent TA_WINDOW samples are plotted, decimated to about TA_PLOT_POINTS
+TA_WINDOW = 4096
+TA_PLOT_POINTS = 2000
+# Constant x-axis vectors, shared across frames (read-only so nothing mutates them in place)
+X_TA = np.arange(TA_WINDOW, dtype=np.float32)
+X_TA.setflags(write=False)
+X_SUB = None  # set in setup_plots once the subcarrier count is known
 rx_ports = set()
+# Sleeps shorter than this are skipped and the feeder keeps publishing instead, so
+# fast feed rates publish several samples per wake-up rather than oversleeping
+FEED_MIN_SLEEP = 0.002
+# Samples are published in chunks covering about one plot frame (the 50 ms timer)
+FEED_TICK = 0.05
 
 def load_csi_from_file(npz_file):
-    data = np.load(npz_file, allow_pickle=True)
-    rx_port_arr = data['rx_port']
-    tx_port_arr = data['tx_port']
-    ta_us_arr = data['ta_us']
-    csi_arr = data['csi']
+    try:
+        with np.load(npz_file) as data:
+            rx_port_arr = data['rx_port']
+            tx_port_arr = data['tx_port']
+            ta_us_arr = data['ta_us']
+            csi_arr = data['csi']
+    except ValueError:
+        # Recordings whose rows had different CSI lengths were saved as an object
+        # array of per-sample vectors; keep the rows as they are, since the feeder
+        # and update_plots only ever use one row at a time
+        with np.load(npz_file, allow_pickle=True) as data:
+            rx_port_arr = data['rx_port']
+            tx_port_arr = data['tx_port']
+            ta_us_arr = data['ta_us']
+            csi_arr = data['csi']
     return rx_port_arr, tx_port_arr, ta_us_arr, csi_arr
 
-def simulate_data_feed_multiple(files, folder="csi_data_logs", feed_interval=0.05, loop=False):
+def simulate_data_feed_multiple(files, folder="csi_data_logs", feed_interval=0.05, loop=False, preloaded=None):
     """
     Simulate real-time data feeding by reading pre-recorded CSI data files.
+    Samples are paced against an absolute schedule (time.monotonic), anchored
+    when each file starts, so sleep overshoot and loop overhead don't accumulate
+    into drift.
+    preloaded maps file paths to already-decoded load_csi_from_file() results;
+    entries are popped from it as they are played.
     """
-    global latest_csi_data, ta_history, rx_ports
+    global latest_csi_data, ta_head, ta_count, ta_min, ta_max, rx_ports
 
+    chunk = min(max(1, round(FEED_TICK / feed_interval)), TA_CAP)
+    # Decoded recordings by path; kept for later passes only when looping. The caller's
+    # dict is consumed in place so a preloaded file is released after its single play.
+    cache = preloaded if preloaded is not None else {}
     while True:
         for filename in files:
             filepath = os.path.join(folder, filename)
-            rx_port_arr, tx_port_arr, ta_us_arr, csi_arr = load_csi_from_file(filepath)
+            arrays = cache.pop(filepath, None)
+            if arrays is None:
+                arrays = load_csi_from_file(filepath)
+            if loop:
+                cache[filepath] = arrays
+            rx_port_arr, tx_port_arr, ta_us_arr, csi_arr = arrays
+            # Re-anchor after loading: decompression time isn't lag to catch up on
+            next_t = time.monotonic()
             print(f"Playing file {filename}, {len(rx_port_arr)} samples")
 
-            for i in range(len(rx_port_arr)):
-                rx_port = int(rx_port_arr[i])
-                ta_us = ta_us_arr[i]
-                csi = csi_arr[i]
+            # Sample indices of each RX port, to find the newest one per chunk without a Python scan
+            groups = {int(rx): np.flatnonzero(rx_port_arr == rx) for rx in np.unique(rx_port_arr)}
+
+            n = len(rx_port_arr)
+            for i in range(0, n, chunk):
+                j = min(i + chunk, n)
+                chunk_csi = {}
+                for rx, idx in groups.items():
+                    pos = np.searchsorted(idx, j) - 1
+                    if pos >= 0 and idx[pos] >= i:
+                        # Copy the row: a view would keep the whole file's csi array alive
+                        chunk_csi[rx] = np.array(csi_arr[idx[pos]])
+                ta_new = ta_us_arr[i:j]
+                k = j - i
 
                 with data_lock:
-                    latest_csi_data[rx_port] = csi
-                    ta_history.append(ta_us)
-                    rx_ports.add(rx_port)
-
-                time.sleep(feed_interval)
+                    end = ta_head + k
+                    if end <= TA_CAP:
+                        ta_buf[ta_head:end] = ta_new
+                    else:
+                        ta_buf[ta_head:] = ta_new[:TA_CAP - ta_head]
+                        ta_buf[:end - TA_CAP] = ta_new[TA_CAP - ta_head:]
+                    ta_head = end % TA_CAP
+                    ta_count = min(ta_count + k, TA_CAP)
+                    ta_min = min(ta_min, ta_new.min())
+                    ta_max = max(ta_max, ta_new.max())
+                    latest_csi_data.update(chunk_csi)
+                    rx_ports.update(chunk_csi)
+
+                next_t += k * feed_interval
+                d = next_t - time.monotonic()
+                if d > FEED_MIN_SLEEP:
+                    time.sleep(d)
 
         if not loop:
             print("Finished playing all files.")
@@ -52,9 +123,85 @@ def simulate_data_feed_multiple(files, folder="csi_data_logs", feed_interval=0.0
 fig = None
 axs = {}
 lines = {}
+blit_mgr = None
 
-def setup_plots():
-    global fig, axs, lines
+def decimate_minmax(y, n_out):
+    """
+    Reduce y to about n_out points by keeping the min and max of each bucket
+    (in time order), which looks identical to the full line at screen resolution.
+    Returns the indices to keep, or None if y is already short enough.
+    """
+    n = len(y)
+    if n <= n_out:
+        return None
+    n_buckets = n_out // 2
+    size = n // n_buckets
+    buckets = y[:n_buckets * size].reshape(n_buckets, size)
+    base = np.arange(n_buckets)[:, None] * size
+    idx = np.sort(np.stack((buckets.argmin(axis=1), buckets.argmax(axis=1)), axis=1), axis=1) + base
+    return np.concatenate((idx.ravel(), np.arange(n_buckets * size, n)))
+
+class BlitManager:
+    """
+    Redraw only the line artists that changed on top of per-axes backgrounds
+    cached at the last full draw (after Matplotlib's blitting tutorial).
+    Any full redraw (resize, expose, limit change) refreshes the cache.
+    Changed axes are blitted as a few union boxes rather than one blit each.
+    """
+
+    # Merge a box into a group only if the union's area stays within this factor
+    # of the area actually being updated
+    MAX_UNION_WASTE = 1.5
+
+    def __init__(self, canvas, artists):
+        self.canvas = canvas
+        self.artists = list(artists)
+        self.backgrounds = {}
+        for a in self.artists:
+            a.set_animated(True)
+        canvas.mpl_connect("draw_event", self.on_draw)
+
+    def on_draw(self, event):
+        self.backgrounds = {a.axes: self.canvas.copy_from_bbox(a.axes.bbox) for a in self.artists}
+        for a in self.artists:
+            a.axes.draw_artist(a)
+
+    def update(self, artists):
+        if not self.backgrounds or not artists:
+            return
+        changed_axes = {a.axes for a in artists}
+        for ax in changed_axes:
+            self.canvas.restore_region(self.backgrounds[ax])
+        for a in artists:
+            a.axes.draw_artist(a)
+        for bbox in self.coalesce([ax.bbox for ax in changed_axes]):
+            self.canvas.blit(bbox)
+
+    def coalesce(self, boxes):
+        """Merge boxes while a union doesn't repaint too much unchanged area."""
+        groups = [(box, box.width * box.height) for box in boxes]  # (union, summed area)
+        if len(groups) > 1:
+            union = Bbox.union([g[0] for g in groups])
+            if union.width * union.height <= self.MAX_UNION_WASTE * sum(g[1] for g in groups):
+                return [union]
+        merged = True
+        while merged:
+            merged = False
+            for i in range(len(groups)):
+                for j in range(i + 1, len(groups)):
+                    union = Bbox.union([groups[i][0], groups[j][0]])
+                    area = groups[i][1] + groups[j][1]
+                    if union.width * union.height <= self.MAX_UNION_WASTE * area:
+                        groups[i] = (union, area)
+                        del groups[j]
+                        merged = True
+                        break
+                if merged:
+                    break
+        return [g[0] for g in groups]
+
+def setup_plots(n_sub):
+    global fig, axs, lines, blit_mgr, X_SUB
 
     # Wait until at least one RX port is available
     while not rx_ports:
@@ -63,6 +210,9 @@ def setup_plots():
     n_rx = len(rx_ports)
     rx_port_list = sorted(list(rx_ports))
 
+    X_SUB = np.arange(n_sub, dtype=np.float32)
+    X_SUB.setflags(write=False)
+
     fig = plt.figure(figsize=(4 * (n_rx + 1), 8))
     gs = fig.add_gridspec(2, n_rx + 1)
 
@@ -74,6 +224,7 @@ def setup_plots():
         ax_mag.set_xlabel('Subcarrier Index', fontsize=12)
         ax_mag.grid(True)
         ax_mag.set_ylim(0, 1)
+        ax_mag.set_xlim(0, n_sub - 1 if n_sub > 1 else 1)
 
         ax_phase = fig.add_subplot(gs[1, i])
         l2, = ax_phase.plot([], [], label=f'RX {rx_port}')
@@ -82,6 +233,7 @@ def setup_plots():
         ax_phase.set_xlabel('Subcarrier Index', fontsize=12)
         ax_phase.grid(True)
         ax_phase.set_ylim(-10, 10)
+        ax_phase.set_xlim(0, n_sub - 1 if n_sub > 1 else 1)
 
         axs[rx_port] = {'mag': ax_mag, 'phase': ax_phase}
         lines[rx_port] = {'mag': l1, 'phase': l2}
@@ -91,6 +243,7 @@ def setup_plots():
     ax_ta.set_title("Time Alignment History", fontsize=14)
     ax_ta.set_ylabel("Time Alignment (µs)", fontsize=12)
     ax_ta.set_xlabel("Sample Index", fontsize=12)
+    ax_ta.set_xlim(0, TA_WINDOW)
     ax_ta.grid(True)
     ax_ta.legend()
 
@@ -99,14 +252,20 @@ def setup_plots():
 
     plt.tight_layout(pad=2.0)
 
-def update_plots(frame):
-    global latest_csi_data, ta_history, lines, axs
+    blit_mgr = BlitManager(fig.canvas, [l for rx in rx_port_list for l in lines[rx].values()] + [l_ta])
+
+def update_plots():
+    global latest_csi_data, lines, axs
 
     updated_lines = []
 
     with data_lock:
         local_csi_data = latest_csi_data.copy()
-        local_ta_history = list(ta_history)
+        n = min(ta_count, TA_WINDOW)
+        if ta_head >= n:
+            local_ta = ta_buf[ta_head - n:ta_head].copy()
+        else:
+            local_ta = np.concatenate((ta_buf[ta_head - n:], ta_buf[:ta_head]))
 
     if not local_csi_data or not lines:
         return []
@@ -117,28 +276,33 @@ def update_plots(frame):
 
         mag = np.abs(csi_data)
         phase_unwrapped = np.unwrap(np.angle(csi_data))
-        x_data = np.arange(len(mag))
+        x_data = X_SUB if len(X_SUB) == len(mag) else np.arange(len(mag))
 
         lines[rx_port]['mag'].set_data(x_data, mag)
-        axs[rx_port]['mag'].set_xlim(0, len(mag) - 1 if len(mag) > 1 else 1)
-
         lines[rx_port]['phase'].set_data(x_data, phase_unwrapped)
-        axs[rx_port]['phase'].set_xlim(0, len(phase_unwrapped) - 1 if len(phase_unwrapped) > 1 else 1)
 
         updated_lines.extend([lines[rx_port]['mag'], lines[rx_port]['phase']])
 
-    if 'ta' in lines and local_ta_history:
+    if 'ta' in lines and len(local_ta):
         ta_line = lines['ta']
         ta_ax = axs['ta']
 
-        x_ta_data = np.arange(len(local_ta_history))
-        ta_line.set_data(x_ta_data, local_ta_history)
+        idx = decimate_minmax(local_ta, TA_PLOT_POINTS)
+        if idx is None:
+            ta_line.set_data(X_TA[:len(local_ta)], local_ta)
+        else:
+            ta_line.set_data(idx, local_ta[idx])
 
-        ta_ax.relim()
-        ta_ax.autoscale_view(True, True, True)
+        # The running extremes only ever widen, so the full redraw a limit change needs is rare
+        lo, hi = ta_ax.get_ylim()
+        if ta_min < lo or ta_max > hi:
+            pad = max(0.1 * (ta_max - ta_min), 1e-3)
+            ta_ax.set_ylim(ta_min - pad, ta_max + pad)
+            fig.canvas.draw_idle()
 
         updated_lines.append(ta_line)
 
+    blit_mgr.update(updated_lines)
     return updated_lines
 
 if __name__ == "__main__":
@@ -149,17 +313,22 @@ if __name__ == "__main__":
         print("No data files found in folder:", folder)
         exit(1)
 
-    # Load the first file to initialize rx_ports for plot setup
+    # Load the first file to initialize rx_ports for plot setup; the feeder reuses it
     first_file = os.path.join(folder, files[0])
-    rx_port_arr, _, _, _ = load_csi_from_file(first_file)
+    first = load_csi_from_file(first_file)
+    n_sub = len(first[3][0])
 
     with data_lock:
-        rx_ports.update(set(rx_port_arr.tolist()))
+        rx_ports.update(set(first[0].tolist()))
 
     # Start a thread to simulate real-time feeding of data from all files
-    t = threading.Thread(target=simulate_data_feed_multiple, args=(files, folder, 0.05, False), daemon=True)
+    t = threading.Thread(target=simulate_data_feed_multiple, args=(files, folder, 0.05, False, {first_file: first}), daemon=True)
+    del first
     t.start()
 
-    setup_plots()
-    ani = FuncAnimation(fig, update_plots, interval=50, blit=False)
+    # Subcarrier count is fixed per session; pin the x-limits so blitted axes stay static
+    setup_plots(n_sub)
+    timer = fig.canvas.new_timer(interval=50)
+    timer.add_callback(update_plots)
+    timer.start()
     plt.show()